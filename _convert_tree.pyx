@@ -0,0 +1,115 @@
+# cython: language_level=3
+"""
+Compiled port of MarkdownConverter._convert_tree (BeautifulSoup parsers).
+
+Build in place with:
+    python setup.py build_ext --inplace
+
+html_to_markdown_v2 uses this module when it is importable and falls back to
+the pure-Python walker otherwise. Keep the logic in sync with _convert_tree.
+"""
+from bs4 import NavigableString, Tag
+
+from markdown_rules_v2 import apply_rule
+
+# Inline tags that very often contain just one text node
+cdef frozenset _LEAFY_TAGS = frozenset({'a', 'code', 'strong', 'b', 'em', 'i'})
+
+
+def convert_tree(converter, root):
+    """
+    Converts the contents of a BeautifulSoup node (its children) to Markdown.
+
+    Args:
+        converter (MarkdownConverter): Supplies markdown_rules, ignore_tags and _convert_text.
+        root: The BeautifulSoup element whose children are converted (e.g. <body>).
+
+    Returns:
+        str: The Markdown representation of the root's contents.
+    """
+    cdef dict rules = converter.markdown_rules
+    cdef object ignore_tags = converter.ignore_tags
+    cdef object convert_text = converter._convert_text
+    cdef list result = []
+    cdef str root_name = root.name
+    cdef list stack = [(convert_text(str(child), root_name) if isinstance(child, NavigableString) else child,
+                        False, None, 0, None, 1, result)
+                       for child in reversed(root.contents)]
+    cdef list children_md_list, child_frames, out, contents
+    cdef str tag_name
+    cdef object element, child, list_type, child_list_type
+    cdef bint visited, is_ol
+    cdef int list_level, item_number, child_list_level, current_item_number, li_item_number
+
+    while stack:
+        element, visited, children_md_list, list_level, list_type, item_number, out = stack.pop()
+
+        # 1. Text, converted when its parent was expanded
+        if type(element) is str:
+            out.append(element)
+            continue
+
+        # Second visit: all children are converted, apply the rule for this tag
+        if visited:
+            tag_name = element.name
+            apply_rule(rules.get(tag_name), element, tag_name, children_md_list,
+                       list_level, list_type, item_number, out)
+            continue
+
+        # 2. Handle Tags
+        if not isinstance(element, Tag):
+            continue
+
+        tag_name = element.name
+
+        # Ignore tags specified in config
+        if tag_name in ignore_tags:
+            continue
+
+        # Handle line breaks
+        if tag_name == 'br':
+            out.append('\n')
+            continue
+
+        # 3. Schedule this tag for its second visit, then its children
+        children_md_list = []
+        stack.append((element, True, children_md_list, list_level, list_type, item_number, out))
+
+        # Fast path: an inline tag holding a single text node is converted right away
+        if tag_name in _LEAFY_TAGS:
+            contents = element.contents
+            if len(contents) == 1 and contents[0].__class__ is NavigableString:
+                children_md_list.append(convert_text(contents[0], tag_name))
+                continue
+
+        # Pass list context down; it depends only on this tag, not on the child
+        if tag_name == 'ul' or tag_name == 'ol':
+            child_list_type = tag_name
+            child_list_level = list_level + 1
+        else:
+            child_list_type = list_type
+            child_list_level = list_level
+
+        child_frames = []
+        is_ol = tag_name == 'ol'
+        current_item_number = 1
+        for child in element.children:
+            if isinstance(child, NavigableString):
+                child_frames.append((convert_text(str(child), tag_name), False, None, 0, None, 1,
+                                     children_md_list))
+                continue
+
+            # Number direct 'li' children of an 'ol'; everything else gets 1
+            li_item_number = 1
+            if is_ol and child.__class__ is Tag and child.name == 'li':
+                li_item_number = current_item_number
+                current_item_number += 1
+
+            child_frames.append((child, False, None, child_list_level, child_list_type,
+                                 li_item_number, children_md_list))
+
+        # Push in reverse so children are converted (and appended) in document order
+        child_frames.reverse()
+        stack.extend(child_frames)
+
+    return ''.join(result)
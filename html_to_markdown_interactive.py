@@ -1,27 +1,38 @@
 import sys
 import os
 import logging
-
-# Import the converter class from the previous file
-# Make sure html_to_markdown_v2.py and markdown_rules_v2.py are in the same directory
-# or accessible via Python's path.
-try:
-    from html_to_markdown_v2 import MarkdownConverter
-except ImportError as e:
-    print(f"Error: Could not import MarkdownConverter from html_to_markdown_v2.py.")
-    print(f"Ensure html_to_markdown_v2.py and markdown_rules_v2.py are in the correct path.")
-    print(f"Details: {e}")
-    sys.exit(1)
+from pathlib import Path
 
 # Configure basic logging for the interactive session
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-# Create a converter instance (using default settings for simplicity)
-# You could potentially add prompts here to customize ignore_tags or log level
-try:
-    converter = MarkdownConverter(log_level_str='INFO')
-except Exception as e:
-    logging.error(f"Failed to initialize MarkdownConverter: {e}", exc_info=True)
-    sys.exit(1)
+
+# The converter is created on first use: importing it pulls in BeautifulSoup,
+# which would otherwise slow down startup even if the user quits right away.
+_converter = None
+
+def get_converter():
+    """Imports and creates the MarkdownConverter on first use, then reuses it."""
+    global _converter
+    if _converter is None:
+        # Import the converter class from the previous file
+        # Make sure html_to_markdown_v2.py and markdown_rules_v2.py are in the same directory
+        # or accessible via Python's path.
+        try:
+            from html_to_markdown_v2 import MarkdownConverter
+        except ImportError as e:
+            print(f"Error: Could not import MarkdownConverter from html_to_markdown_v2.py.")
+            print(f"Ensure html_to_markdown_v2.py and markdown_rules_v2.py are in the correct path.")
+            print(f"Details: {e}")
+            sys.exit(1)
+
+        # Create a converter instance (using default settings for simplicity)
+        # You could potentially add prompts here to customize ignore_tags or log level
+        try:
+            _converter = MarkdownConverter()
+        except Exception as e:
+            logging.error(f"Failed to initialize MarkdownConverter: {e}", exc_info=True)
+            sys.exit(1)
+    return _converter
 
 def get_html_from_file():
     """Prompts the user for a file path and reads the HTML content."""
@@ -31,9 +42,9 @@ def get_html_from_file():
             if not input_file:
                 print("Input file path cannot be empty.")
                 continue
-            with open(input_file, 'r', encoding='utf-8') as f:
-                logging.info(f"Reading HTML from: {input_file}")
-                return f.read()
+            logging.info(f"Reading HTML from: {input_file}")
+            # Read raw bytes and decode in one step, bypassing the buffered text layer
+            return Path(input_file).read_bytes().decode('utf-8')
         except FileNotFoundError:
             logging.error(f"Error: Input file not found at '{input_file}'. Please try again.")
         except IOError as e:
@@ -81,9 +92,8 @@ def save_markdown_to_file(markdown_content):
                 logging.info(f"Creating output directory: {output_dir}")
                 os.makedirs(output_dir, exist_ok=True)
 
-            with open(output_file, 'w', encoding='utf-8') as out:
-                logging.info(f"Writing Markdown to: {output_file}")
-                out.write(markdown_content)
+            logging.info(f"Writing Markdown to: {output_file}")
+            Path(output_file).write_text(markdown_content, encoding='utf-8')
             print(f"Successfully saved Markdown to {output_file}")
             return True # Indicate success
 
@@ -128,7 +138,7 @@ def interactive_main():
 
         # --- Perform Conversion ---
         try:
-            markdown_result = converter.convert(html_content)
+            markdown_result = get_converter().convert(html_content)
         except ValueError as e: # Catch validation errors from converter
             logging.error(f"HTML Conversion Error: {e}")
             print("Could not convert the provided HTML. Please check the input.")
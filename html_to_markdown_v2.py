@@ -1,16 +1,90 @@
 import sys
-import re # Needed for final cleanup and potentially escaping
-import logging
-import argparse
+import codecs
 import glob
+import logging
 import os
-import functools # For lru_cache
+import warnings
+from pathlib import Path
+# argparse, asyncio and concurrent.futures are only needed by the CLI and are
+# imported where used, keeping `import html_to_markdown_v2` cheap for library use.
 from bs4 import BeautifulSoup, NavigableString, Tag
 
 # Import rules from the updated file
-from markdown_rules_v2 import MARKDOWN_RULES, escape_markdown_chars
+from markdown_rules_v2 import LXML_RULES, MARKDOWN_RULES, apply_rule, escape_markdown_chars
+
+# lxml is optional: it parses in C and is much faster than the pure-Python
+# 'html.parser' on large documents. Fall back gracefully if it is missing.
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Optional compiled tree walker, built from _convert_tree.pyx with
+# `python setup.py build_ext --inplace`. Falls back to the pure-Python walker.
+try:
+    from _convert_tree import convert_tree as _compiled_convert_tree
+except ImportError:
+    _compiled_convert_tree = None
+
+# Inline tags that very often contain just one text node; see _convert_tree
+_LEAFY_TAGS = frozenset({'a', 'code', 'strong', 'b', 'em', 'i'})
+
+def _collapse_newlines(text):
+    """
+    Collapses runs of three or more newlines into a single blank line.
+
+    Uses repeated str.replace (a C-level scan) instead of a regex; each pass
+    removes a third of every remaining run, so only a few passes are needed.
+    """
+    while '\n\n\n' in text:
+        text = text.replace('\n\n\n', '\n\n')
+    return text
+
+class _StrictUTF8Reader:
+    """
+    Binary file wrapper that checks the bytes read through it are valid UTF-8.
+
+    lxml replaces undecodable bytes with U+FFFD; this raises UnicodeDecodeError
+    instead, as decoding the whole file up front does.
+    """
+    def __init__(self, file_obj):
+        self._file = file_obj
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self._decoder.decode(data, final=not data)
+        return data
 
-# Configure logging (will be updated in MarkdownConverter init)
+# Rule arguments, in the order the walkers pass them
+_RULE_ARGS = ('element', 'children_md', 'list_level', 'list_type', 'item_number')
+
+def _positional_rule(rule):
+    """
+    Adapts a user-supplied rule to the positional calling convention.
+
+    Rules used to be called with keyword arguments only, so rules written for that
+    (e.g. `lambda element, children_md, **kwargs: ...`) are wrapped to keep receiving
+    keywords. Rules whose first parameters are already the rule arguments in order,
+    and (prefix, suffix) tuples, are returned unchanged.
+    """
+    if rule.__class__ is tuple:
+        return rule
+    import inspect
+    try:
+        params = list(inspect.signature(rule).parameters.values())[:len(_RULE_ARGS)]
+    except (TypeError, ValueError): # No signature available (e.g. some builtins)
+        params = []
+    if (tuple(param.name for param in params) == _RULE_ARGS
+            and all(param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD) for param in params)):
+        return rule
+    def keyword_rule(element, children_md, list_level, list_type, item_number):
+        return rule(element=element, children_md=children_md, list_level=list_level,
+                    list_type=list_type, item_number=item_number)
+    return keyword_rule
+
+# Configure logging (the level is set from the command line in main())
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
 # --- Improvement 3: Configuration and Extensibility ---
@@ -18,19 +92,53 @@ class MarkdownConverter:
     def __init__(self,
                  custom_rules=None,
                  ignore_tags=None,
-                 log_level_str='INFO'):
+                 log_level_str=None,
+                 parser='lxml'):
         """
         Initialize the MarkdownConverter.
 
         Args:
-            custom_rules (dict, optional): Dictionary to update/add markdown rules.
+            custom_rules (dict, optional): Dictionary to update/add markdown rules. A rule is a
+                function taking (element, children_md, list_level, list_type, item_number), or a
+                (prefix, suffix) tuple wrapped around the children's Markdown. Functions that only
+                accept these as keyword arguments (e.g. via **kwargs) are called with keywords.
             ignore_tags (list or set, optional): Tags to completely ignore during conversion.
-            log_level_str (str, optional): Logging level ('DEBUG', 'INFO', 'WARNING', 'ERROR').
+            log_level_str (str, optional): Deprecated and ignored. The converter no longer
+                changes the root logger's level; configure logging in the application
+                (the CLI uses --log-level).
+            parser (str, optional): BeautifulSoup parser to use. Defaults to 'lxml',
+                which is considerably faster on large documents. 'lxml-fast' skips
+                BeautifulSoup entirely and walks lxml elements directly; custom rules
+                then receive lxml elements instead of BeautifulSoup tags. Both lxml
+                options fall back to the built-in 'html.parser' if lxml is not installed.
         """
+        if log_level_str is not None:
+            warnings.warn("MarkdownConverter's log_level_str is deprecated and ignored; "
+                          "set the logging level in the application instead.",
+                          DeprecationWarning, stacklevel=2)
+
+        if parser in ('lxml', 'lxml-fast') and not LXML_AVAILABLE:
+            logging.warning("lxml is not installed; falling back to 'html.parser'.")
+            parser = 'html.parser'
+        self.parser = parser
+
         self.markdown_rules = MARKDOWN_RULES.copy()
         if custom_rules:
+            # The walkers call rules positionally; adapt the user's rules once here
+            custom_rules = {tag: _positional_rule(rule) for tag, rule in custom_rules.items()}
             self.markdown_rules.update(custom_rules)
 
+        # Rules used when walking lxml elements ('lxml-fast' and convert_stream):
+        # a few default rules read raw text through BeautifulSoup-only APIs.
+        self._lxml_rules = {**MARKDOWN_RULES, **LXML_RULES, **(custom_rules or {})}
+        if self.parser == 'lxml-fast':
+            self.markdown_rules = self._lxml_rules
+
+        # convert_stream walks lxml elements with the lxml-fast rules, so its output only
+        # matches convert() for 'lxml-fast'. BeautifulSoup trees differ in more than the
+        # rules (e.g. comments and CDATA become text), so other parsers never stream.
+        self.supports_streaming = self.parser == 'lxml-fast'
+
         # Default tags to ignore + any user-provided ones
         default_ignore = {'script', 'style', 'head', 'title', 'meta', 'link'}
         if ignore_tags:
@@ -38,152 +146,341 @@ class MarkdownConverter:
         else:
             self.ignore_tags = default_ignore
 
-        # Configure logging level
-        log_level = getattr(logging, log_level_str.upper(), logging.INFO)
-        # Update the root logger's level. Note: This affects global logging.
-        # For more isolated logging, instantiate a separate logger.
-        logging.getLogger().setLevel(log_level)
-
         logging.debug("MarkdownConverter initialized.")
         logging.debug(f"Ignore tags: {self.ignore_tags}")
+        logging.debug(f"Parser: {self.parser}")
 
     # --- Improvement 1: Error Handling and Validation ---
-    def _validate_input(self, html_content):
+    # Validation is split around a single parse: the raw string is checked first,
+    # then parsed once, and the resulting tree is checked and reused by convert().
+    def _check_nonempty(self, html_content):
         """
-        Validates the input HTML content.
+        Checks that the input HTML is not empty.
 
         Args:
             html_content (str): The HTML content string.
 
         Raises:
-            ValueError: If HTML content is empty or seems invalid.
+            ValueError: If HTML content is empty or whitespace only.
         """
         if not html_content or not html_content.strip():
             raise ValueError("Input HTML content is empty or whitespace only")
 
+    def _parse(self, html_content):
+        """
+        Parses the input HTML with the configured BeautifulSoup parser.
+
+        Args:
+            html_content (str): The HTML content string.
+
+        Returns:
+            BeautifulSoup: The parsed document.
+
+        Raises:
+            ValueError: If BeautifulSoup fails to parse the input.
+        """
         try:
-            # Basic check: Does it parse at all and contain any tags?
-            soup = BeautifulSoup(html_content, 'html.parser')
-            if not soup.find():
-                # Allow empty body/html tag, but check if there's *any* content node
-                if not soup.contents:
-                     raise ValueError("Input HTML appears empty or contains no valid elements")
-                # If only a root like <html> or <body> exists but is empty, allow it
-                # More complex validation (e.g., DTD) is outside scope here.
+            return BeautifulSoup(html_content, self.parser)
         except Exception as e:
             # Catch potential parsing errors from BeautifulSoup
             logging.error(f"HTML parsing error during validation: {e}")
             raise ValueError(f"Failed to parse HTML: {e}") from e
 
-    # --- Improvement 4: Performance Optimization (Caching) ---
-    # Note: Caching BeautifulSoup objects can be tricky if they aren't perfectly hashable
-    # or if their identity changes unexpectedly. Test thoroughly for complex HTML.
-    # maxsize chosen arbitrarily, adjust based on memory/performance needs.
-    @functools.lru_cache(maxsize=1024)
-    def _convert_node_to_markdown(self, element, list_level=0, list_type=None, item_number=1):
+    def _check_tree(self, soup):
+        """
+        Checks that a parsed document contains something to convert.
+
+        Args:
+            soup (BeautifulSoup): The parsed document.
+
+        Raises:
+            ValueError: If the document has no elements or content at all.
+        """
+        # Basic check: does it contain any tags?
+        if not soup.find():
+            # Allow empty body/html tag, but check if there's *any* content node
+            if not soup.contents:
+                raise ValueError("Input HTML appears empty or contains no valid elements")
+            # If only a root like <html> or <body> exists but is empty, allow it
+            # More complex validation (e.g., DTD) is outside scope here.
+
+    def _convert_text(self, text, parent_name):
+        """
+        Converts a run of text to Markdown.
+
+        Args:
+            text (str): The text (a NavigableString, or lxml .text/.tail).
+            parent_name (str): Name of the tag containing the text.
+
+        Returns:
+            str: The escaped (or preserved, inside <pre>) text.
         """
-        Recursively converts a BeautifulSoup node (Tag or NavigableString) to Markdown.
+        # Avoid stripping significant whitespace within tags like <pre> or <code>
+        # Check parent tag - simple check for now
+        if parent_name == 'pre':
+            return text # Preserve whitespace in pre tags
+        if text.isspace():
+            # Keep space if it's between inline elements, strip otherwise
+            # This is complex; a simple approach is to strip if it's just whitespace
+            # Only return a single space if it seems significant (e.g., between words/tags)
+            # Check siblings - needs more complex logic, return ' ' for now if needed
+            # For simplicity, let's just return '' for pure whitespace nodes unless in <pre>
+            return ''
+        # Apply basic stripping and escaping for general text
+        return escape_markdown_chars(text.strip())
+
+    # --- Improvement 4: Performance Optimization (Iterative Traversal) ---
+    # The tree is walked with an explicit stack instead of recursion. This avoids
+    # Python's recursion limit on deeply nested HTML and the per-call overhead of
+    # the lru_cache that used to wrap this method (BeautifulSoup nodes hash by
+    # identity, so cache hits never happened within a document).
+    def _convert_tree(self, root):
+        """
+        Converts the contents of a BeautifulSoup node (its children, not the node itself) to Markdown.
         (Internal method using instance state like self.ignore_tags, self.markdown_rules)
 
+        Performs an iterative post-order walk. Each stack frame is
+        (element, visited, children_md_list, list_level, list_type, item_number, out):
+        on the first visit a tag's children are pushed, on the second visit the tag's
+        rule is applied to the collected children Markdown. Text nodes are converted
+        when their parent is expanded (so the parent's name is at hand) and pushed
+        as ready-made strings to keep document order. Output is appended to
+        `out`, the parent frame's children list, as fragments: tags without a rule
+        and (prefix, suffix) wrapper rules pass their children's fragments up
+        unjoined, so text is only copied by function rules and the final join.
+
         Args:
-            element: The BeautifulSoup element (Tag or NavigableString).
-            list_level (int): Current nesting level for lists.
-            list_type (str | None): Type of the current list ('ul' or 'ol').
-            item_number (int): The item number if this node is an 'li' within an 'ol'.
+            root: The BeautifulSoup element whose children are converted (e.g. <body>).
 
         Returns:
-            str: The Markdown representation of the node.
+            str: The Markdown representation of the root's contents.
         """
-        # 1. Handle Text Nodes (NavigableString)
-        if isinstance(element, NavigableString):
-            text = str(element)
-            # Avoid stripping significant whitespace within tags like <pre> or <code>
-            # Check parent tag - simple check for now
-            parent_name = getattr(element.parent, 'name', '')
-            if parent_name not in ['pre'] and not text.isspace():
-                 # Apply basic stripping and escaping for general text
-                 return escape_markdown_chars(text.strip())
-            elif parent_name == 'pre':
-                 return text # Preserve whitespace in pre tags
+        get_rule = self.markdown_rules.get # Bound once; looked up for every tag
+        convert_text = self._convert_text
+        result = []
+        # Start list level at 0, type None, item_number 1 for the root's children
+        root_name = root.name
+        stack = [(convert_text(str(child), root_name) if isinstance(child, NavigableString) else child,
+                  False, None, 0, None, 1, result)
+                 for child in reversed(root.contents)]
+
+        while stack:
+            element, visited, children_md_list, list_level, list_type, item_number, out = stack.pop()
+
+            # 1. Text, converted when its parent was expanded
+            if element.__class__ is str:
+                out.append(element)
+                continue
+
+            # Second visit: all children are converted, apply the rule for this tag
+            if visited:
+                tag_name = element.name
+                apply_rule(get_rule(tag_name), element, tag_name, children_md_list,
+                           list_level, list_type, item_number, out)
+                continue
+
+            # 2. Handle Tags
+            if not isinstance(element, Tag):
+                continue # Should not happen with standard BS parsing
+
+            tag_name = element.name
+
+            # Ignore tags specified in config
+            if tag_name in self.ignore_tags:
+                logging.debug(f"Ignoring tag: <{tag_name}>")
+                continue
+
+            # Handle line breaks
+            if tag_name == 'br':
+                out.append('\n') # Use single newline, final cleanup will handle multiples
+                continue
+
+            # 3. Schedule this tag for its second visit, then its children
+            children_md_list = []
+            stack.append((element, True, children_md_list, list_level, list_type, item_number, out))
+
+            # Fast path: an inline tag holding a single text node is converted right
+            # away, skipping child frames and list-context bookkeeping. (element.string
+            # is not enough: it also looks through a single child tag.)
+            if tag_name in _LEAFY_TAGS:
+                contents = element.contents
+                if len(contents) == 1 and contents[0].__class__ is NavigableString:
+                    children_md_list.append(convert_text(contents[0], tag_name))
+                    continue
+
+            # Pass list context down; it depends only on this tag, not on the child
+            if tag_name == 'ul' or tag_name == 'ol':
+                child_list_type = tag_name
+                child_list_level = list_level + 1
             else:
-                 # Keep space if it's between inline elements, strip otherwise
-                 # This is complex; a simple approach is to strip if it's just whitespace
-                 if text.isspace():
-                     # Only return a single space if it seems significant (e.g., between words/tags)
-                     # Check siblings - needs more complex logic, return ' ' for now if needed
-                     # For simplicity, let's just return '' for pure whitespace nodes unless in <pre>
-                     return ''
-                 else:
-                     return escape_markdown_chars(text) # Escape non-space text
-
-        # 2. Handle Tags
-        if not isinstance(element, Tag):
-            return '' # Should not happen with standard BS parsing
-
-        tag_name = element.name
-
-        # Ignore tags specified in config
-        if tag_name in self.ignore_tags:
-            logging.debug(f"Ignoring tag: <{tag_name}>")
-            return ''
+                child_list_type = list_type
+                child_list_level = list_level
 
-        # Handle line breaks
-        if tag_name == 'br':
-            return '\n' # Use single newline, final cleanup will handle multiples
+            child_frames = []
+            is_ol = tag_name == 'ol'
+            current_item_number = 1 # For ordered lists within the current element's children
+            for child in element.children:
+                if isinstance(child, NavigableString):
+                    child_frames.append((convert_text(str(child), tag_name), False, None, 0, None, 1,
+                                         children_md_list))
+                    continue
 
-        # 3. Recursively process children
-        children_md = ""
-        current_item_number = 1 # For ordered lists within the current element's children
-        for child in element.children:
+                # Number direct 'li' children of an 'ol'; everything else gets 1
+                li_item_number = 1
+                if is_ol and child.__class__ is Tag and child.name == 'li':
+                    li_item_number = current_item_number
+                    current_item_number += 1
+
+                child_frames.append((child, False, None, child_list_level, child_list_type,
+                                     li_item_number, children_md_list))
+
+            # Push in reverse so children are converted (and appended) in document order
+            stack.extend(reversed(child_frames))
+
+        return ''.join(result)
+
+
+    def _lxml_child_frames(self, element, list_level, list_type, out):
+        """
+        Builds stack frames for the contents of an lxml element, in document order:
+        its leading text, then each child element followed by that child's tail text.
+        Text is converted right away and pushed as a ready-made string. Comments and
+        processing instructions (whose .tag is not a string) are skipped.
+
+        Args:
+            element: The lxml element being expanded.
+            list_level (int): Nesting level for lists of the element itself.
+            list_type (str | None): List type of the element itself.
+            out (list): The element's children Markdown list.
+
+        Returns:
+            list: Stack frames in document order.
+        """
+        tag_name = element.tag
+        convert_text = self._convert_text
+
+        # Pass list context down; it depends only on this tag, not on the child
+        if tag_name == 'ul' or tag_name == 'ol':
+            child_list_type = tag_name
+            child_list_level = list_level + 1
+        else:
             child_list_type = list_type
             child_list_level = list_level
-            # Pass list context down
-            if tag_name == 'ul':
-                child_list_type = 'ul'
-                child_list_level += 1
-            elif tag_name == 'ol':
-                child_list_type = 'ol'
-                child_list_level += 1
-
-            # Determine the item number for li elements
-            li_item_number = 1
-            if tag_name == 'ol' and isinstance(child, Tag) and child.name == 'li':
-                li_item_number = current_item_number
-
-            # Recursive call
-            children_md += self._convert_node_to_markdown(
-                child,
-                list_level=child_list_level,
-                list_type=child_list_type,
-                item_number=li_item_number # Pass the calculated item number for this child if it's an li
-            )
-
-            # Increment item number for direct children of 'ol' that are 'li'
-            if tag_name == 'ol' and isinstance(child, Tag) and child.name == 'li':
-                current_item_number += 1
-
-        # 4. Apply Markdown rule for the current tag
-        if tag_name in self.markdown_rules:
-            rule = self.markdown_rules[tag_name]
-            try:
-                # Pass necessary context to the rule
-                kwargs = {
-                    'element': element,
-                    'children_md': children_md,
-                    'list_level': list_level,
-                    'list_type': list_type,
-                    'item_number': item_number # Pass the item_number received from parent
-                }
-                return rule(**kwargs)
-            except TypeError as e:
-                logging.warning(f"Rule for '{tag_name}' failed or has wrong signature: {e}. Using children content. Check rule definition.")
-                # Fallback if rule fails or doesn't accept expected args
-                return children_md # Return processed children content as fallback
+
+        frames = []
+        if element.text:
+            frames.append((convert_text(element.text, tag_name), False, None, 0, None, 1, out))
+
+        is_ol = tag_name == 'ol'
+        current_item_number = 1 # For ordered lists within the current element's children
+        for child in element:
+            if child.tag.__class__ is str:
+                # Number direct 'li' children of an 'ol'; everything else gets 1
+                li_item_number = 1
+                if is_ol and child.tag == 'li':
+                    li_item_number = current_item_number
+                    current_item_number += 1
+
+                frames.append((child, False, None, child_list_level, child_list_type,
+                               li_item_number, out))
+            if child.tail:
+                frames.append((convert_text(child.tail, tag_name), False, None, 0, None, 1, out))
+        return frames
+
+    def _convert_lxml_tree(self, root, contents_only=True):
+        """
+        Converts an lxml element to Markdown ('lxml-fast' parser and convert_stream).
+
+        Same iterative post-order walk as _convert_tree, but over lxml elements:
+        text lives in element.text/child.tail rather than in separate nodes, so
+        string frames carry already-converted text.
+
+        Args:
+            root: The lxml element to convert.
+            contents_only (bool): Convert only the root's contents (text and children),
+                not the root element itself. Used for <body>.
+
+        Returns:
+            str: The Markdown representation of the root (or its contents).
+        """
+        get_rule = self._lxml_rules.get # Bound once; looked up for every tag
+        ignore_tags = self.ignore_tags
+        result = []
+        if contents_only:
+            stack = self._lxml_child_frames(root, 0, None, result)
+            stack.reverse()
         else:
-            # Default for unknown tags: return children's content
-            logging.debug(f"No rule found for tag '{tag_name}'. Returning children content.")
-            return children_md
+            stack = [(root, False, None, 0, None, 1, result)]
+
+        while stack:
+            element, visited, children_md_list, list_level, list_type, item_number, out = stack.pop()
+
+            # Text, converted when its parent was expanded
+            if element.__class__ is str:
+                out.append(element)
+                continue
+
+            tag_name = element.tag
+
+            # Second visit: all children are converted, apply the rule for this tag
+            if visited:
+                apply_rule(get_rule(tag_name), element, tag_name, children_md_list,
+                           list_level, list_type, item_number, out)
+                continue
+
+            # Ignore tags specified in config
+            if tag_name in ignore_tags:
+                continue
+
+            # Handle line breaks
+            if tag_name == 'br':
+                out.append('\n')
+                continue
+
+            children_md_list = []
+            stack.append((element, True, children_md_list, list_level, list_type, item_number, out))
+            # Push in reverse so children are converted (and appended) in document order
+            stack.extend(reversed(self._lxml_child_frames(element, list_level, list_type, children_md_list)))
+
+        return ''.join(result)
+
+    def _parse_lxml(self, html_content):
+        """
+        Validates and parses the input HTML with lxml ('lxml-fast' parser).
 
+        Args:
+            html_content (str): The HTML content string.
+
+        Returns:
+            The lxml <body> element, or the document root if there is no body.
+
+        Raises:
+            ValueError: If HTML content is empty or cannot be parsed.
+        """
+        self._check_nonempty(html_content)
+
+        try:
+            # lxml parsers must not be used by two threads at once, and a converter
+            # may be shared across threads, so each call gets its own (cheap) parser.
+            # huge_tree raises libxml2's default nesting limit of 256 elements.
+            lxml_parser = lxml.html.HTMLParser(encoding='utf-8', huge_tree=True)
+            # Pass UTF-8 bytes: lxml rejects str input that carries an encoding declaration
+            document = lxml.html.document_fromstring(html_content.encode('utf-8'), parser=lxml_parser)
+        except (lxml.etree.ParserError, ValueError) as e:
+            logging.error(f"HTML parsing error during validation: {e}")
+            raise ValueError(f"Failed to parse HTML: {e}") from e
+
+        # libxml2 recovers from ordinary HTML errors, but on a fatal one (e.g. nesting
+        # deeper than ~2048 levels even with huge_tree) it silently stops, dropping
+        # the rest of the document. Don't return incomplete Markdown for that.
+        fatal_errors = lxml_parser.error_log.filter_from_level(lxml.etree.ErrorLevels.FATAL)
+        if fatal_errors:
+            message = fatal_errors[0].message
+            logging.error(f"HTML parsing error during validation: {message}")
+            raise ValueError(f"Failed to parse HTML: {message}")
+
+        body = document.find('body')
+        return body if body is not None else document
 
     def convert(self, html_content):
         """
@@ -199,75 +496,250 @@ class MarkdownConverter:
             ValueError: If input validation fails.
         """
         logging.info("Starting HTML to Markdown conversion...")
-        self._validate_input(html_content)
+        if self.parser == 'lxml-fast':
+            markdown_content = self._convert_lxml_tree(self._parse_lxml(html_content))
+        else:
+            # Parse once; the validated soup is reused for conversion below
+            self._check_nonempty(html_content)
+            soup = self._parse(html_content)
+            self._check_tree(soup)
+
+            # Prefer body if it exists, otherwise use the whole soup's children
+            root_element = soup.body if soup.body else soup
+
+            # Convert the root's children (not the root itself, to avoid wrapping the
+            # whole doc in a spurious tag); all fragments are joined once at the end
+            if _compiled_convert_tree is not None:
+                markdown_content = _compiled_convert_tree(self, root_element)
+            else:
+                markdown_content = self._convert_tree(root_element)
 
-        # Clear cache if running multiple conversions with the same instance (optional)
-        # self._convert_node_to_markdown.cache_clear()
-        # Note: Cache is instance-based; creating a new instance per file implicitly clears.
+        # Clean up excessive newlines (more than 2 consecutive) and leading/trailing whitespace
+        markdown_content = _collapse_newlines(markdown_content.strip())
 
-        soup = BeautifulSoup(html_content, 'html.parser')
+        logging.info("Conversion finished.")
+        return markdown_content
 
-        # Prefer body if it exists, otherwise use the whole soup's children
-        root_element = soup.body if soup.body else soup
+    def convert_stream(self, file_obj):
+        """
+        Converts an HTML file to Markdown without building the whole document tree.
 
-        # Join parts converted from root's direct children
-        # We process children of the root individually to avoid wrapping the whole doc in a spurious tag
-        # Start list level at 0, type None, item_number 1 initially
-        markdown_parts = [self._convert_node_to_markdown(child, 0, None, 1) for child in root_element.children]
-        markdown_content = "".join(markdown_parts)
+        The input is parsed incrementally with lxml.etree.iterparse. Each direct
+        child of <body> is converted as soon as it is complete and then removed
+        from the tree, so peak memory stays bounded by the largest top-level
+        block rather than the whole document. Uses the same rules as 'lxml-fast'.
 
-        # Clean up excessive newlines (more than 2 consecutive) and leading/trailing whitespace
-        markdown_content = re.sub(r'\n{3,}', '\n\n', markdown_content.strip())
+        Args:
+            file_obj: A binary file object (or path) containing UTF-8 HTML.
+
+        Returns:
+            str: The converted Markdown string.
+
+        Raises:
+            ValueError: If the input cannot be parsed completely (iterparse stops at
+                about 256 levels of nesting), or lxml is not installed.
+            UnicodeDecodeError: If the input is not valid UTF-8.
+        """
+        if not LXML_AVAILABLE:
+            raise ValueError("Streaming conversion requires lxml")
+        if not hasattr(file_obj, 'read'):
+            with open(file_obj, 'rb') as f:
+                return self.convert_stream(f)
+
+        logging.info("Starting streaming HTML to Markdown conversion...")
+        convert_text = self._convert_text
+        markdown_parts = []
+        body = None
+
+        try:
+            events = lxml.etree.iterparse(_StrictUTF8Reader(file_obj), events=('end',), html=True,
+                                          encoding='utf-8', huge_tree=True)
+            for _, element in events:
+                parent = element.getparent()
+                if parent is None or parent.tag != 'body':
+                    if element.tag == 'body' and body is None:
+                        # <body> without child elements, e.g. only text
+                        body = element
+                        if body.text:
+                            markdown_parts.append(convert_text(body.text, 'body'))
+                    continue # Nested element; converted with its top-level block
+
+                if body is None:
+                    body = parent
+                    if body.text:
+                        markdown_parts.append(convert_text(body.text, 'body'))
+
+                # Preceding siblings are converted already and their tails are now
+                # complete: emit the tails and drop the siblings to free memory
+                while body[0] is not element:
+                    sibling = body[0]
+                    if sibling.tail:
+                        markdown_parts.append(convert_text(sibling.tail, 'body'))
+                    del body[0]
+
+                if element.tag.__class__ is str:
+                    markdown_parts.append(self._convert_lxml_tree(element, contents_only=False))
+                # Free the subtree now; the tail is still being parsed
+                element.clear(keep_tail=True)
+        except lxml.etree.LxmlError as e:
+            logging.error(f"HTML parsing error during streaming: {e}")
+            raise ValueError(f"Failed to parse HTML: {e}") from e
+
+        # On a fatal error (e.g. nesting deeper than iterparse's limit of about 256 levels,
+        # which huge_tree does not lift here) libxml2 stops emitting events without raising
+        fatal_errors = events.error_log.filter_from_level(lxml.etree.ErrorLevels.FATAL)
+        if fatal_errors:
+            raise ValueError(f"Failed to parse HTML: {fatal_errors[0].message}")
+
+        # Tails of the last top-level block (and anything after it)
+        if body is not None:
+            for sibling in body:
+                if sibling.tail:
+                    markdown_parts.append(convert_text(sibling.tail, 'body'))
+
+        markdown_content = "".join(markdown_parts)
+        markdown_content = _collapse_newlines(markdown_content.strip())
 
         logging.info("Conversion finished.")
         return markdown_content
 
 # --- Improvement 5: Enhanced CLI / Batch Processing ---
 
-def convert_file(input_file, output_file, converter_config):
+# With parser='lxml-fast', inputs larger than this are converted with MarkdownConverter.convert_stream
+STREAM_THRESHOLD_BYTES = 2 * 1024 * 1024
+
+def _read_html(input_file):
+    """Reads an HTML file as UTF-8 text."""
+    logging.info(f"Processing file: {input_file}")
+    # Read raw bytes and decode in one step, bypassing the buffered text layer
+    return Path(input_file).read_bytes().decode('utf-8')
+
+def _write_markdown(output_file, md_content):
+    """Writes Markdown to a file, creating its directory if needed."""
+    # Ensure output directory exists
+    output_dir = os.path.dirname(output_file)
+    if output_dir and not os.path.exists(output_dir):
+        logging.info(f"Creating output directory: {output_dir}")
+        os.makedirs(output_dir, exist_ok=True)
+
+    logging.info(f"Writing Markdown to: {output_file}")
+    Path(output_file).write_text(md_content, encoding='utf-8')
+
+def _log_conversion_error(error, input_file, output_file):
+    """Logs an error raised while converting a single file in a batch."""
+    if isinstance(error, FileNotFoundError):
+        logging.error(f"Error: Input file not found at {input_file}")
+    elif isinstance(error, IOError):
+        logging.error(f"Error reading or writing file {input_file} or {output_file}: {error}")
+    elif isinstance(error, ValueError): # Catch validation errors from converter
+        logging.error(f"Error converting file {input_file}: {error}")
+    else:
+        logging.error(f"An unexpected error occurred processing {input_file}: {error}",
+                      exc_info=error) # Log full traceback
+
+def convert_file(input_file, output_file, converter):
     """
     Reads an HTML file, converts it using MarkdownConverter, and writes to a Markdown file.
 
     Args:
         input_file (str): Path to the input HTML file.
         output_file (str): Path to the output Markdown file.
-        converter_config (dict): Configuration options for MarkdownConverter.
+        converter (MarkdownConverter): Converter shared by all files in the batch.
     """
     try:
-        logging.info(f"Processing file: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        md_content = None
+        if converter.supports_streaming and os.path.getsize(input_file) > STREAM_THRESHOLD_BYTES:
+            # Large file: parse incrementally instead of holding text and tree at once
+            logging.info(f"Processing file (streaming): {input_file}")
+            try:
+                with open(input_file, 'rb') as f:
+                    md_content = converter.convert_stream(f)
+            except UnicodeDecodeError:
+                raise # Not UTF-8; converting in memory would fail the same way
+            except ValueError as e:
+                # e.g. nesting too deep for iterparse; convert() copes with it
+                logging.warning(f"Streaming conversion of {input_file} failed ({e}); converting in memory.")
+        if md_content is None:
+            html_content = _read_html(input_file)
+            md_content = converter.convert(html_content)
+
+        _write_markdown(output_file, md_content)
+        logging.info(f"Successfully converted {input_file} to {output_file}")
 
-        # Create a converter instance for each file (clears cache implicitly)
-        converter = MarkdownConverter(**converter_config)
-        md_content = converter.convert(html_content)
+    except Exception as e:
+        # Optionally re-raise or handle differently if used in a larger batch process
+        _log_conversion_error(e, input_file, output_file)
 
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_file)
-        if output_dir and not os.path.exists(output_dir):
-            logging.info(f"Creating output directory: {output_dir}")
-            os.makedirs(output_dir, exist_ok=True)
+async def _async_convert(input_file, output_file, converter, semaphore):
+    """
+    Asynchronous counterpart of convert_file for I/O-bound batches.
 
-        logging.info(f"Writing Markdown to: {output_file}")
-        with open(output_file, 'w', encoding='utf-8') as out:
-            out.write(md_content)
+    File reads and writes run in worker threads so they overlap with the
+    conversion of other files; the CPU-bound conversion itself runs in the
+    event loop's default executor.
 
-        logging.info(f"Successfully converted {input_file} to {output_file}")
+    Args:
+        input_file (str): Path to the input HTML file.
+        output_file (str): Path to the output Markdown file.
+        converter (MarkdownConverter): Converter shared by all files in the batch.
+        semaphore (asyncio.Semaphore): Bounds the number of files in flight.
+    """
+    import asyncio
 
-    except FileNotFoundError:
-        logging.error(f"Error: Input file not found at {input_file}")
-        # Optionally re-raise or handle differently if used in a larger batch process
-    except IOError as e:
-        logging.error(f"Error reading or writing file {input_file} or {output_file}: {e}")
-    except ValueError as e: # Catch validation errors from converter
-        logging.error(f"Error converting file {input_file}: {e}")
-    except Exception as e:
-        logging.error(f"An unexpected error occurred processing {input_file}: {e}", exc_info=True) # Log full traceback
+    async with semaphore:
+        try:
+            html_content = await asyncio.to_thread(_read_html, input_file)
+
+            loop = asyncio.get_running_loop()
+            md_content = await loop.run_in_executor(None, converter.convert, html_content)
+
+            await asyncio.to_thread(_write_markdown, output_file, md_content)
+            logging.info(f"Successfully converted {input_file} to {output_file}")
+
+        except Exception as e:
+            _log_conversion_error(e, input_file, output_file)
+
+async def _gather_all(pairs, converter, max_in_flight):
+    """
+    Converts all (input_file, output_file) pairs concurrently with one shared
+    converter, with at most `max_in_flight` files being processed at once.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+    await asyncio.gather(*(_async_convert(input_file, output_file, converter, semaphore)
+                           for input_file, output_file in pairs))
+
+# Converter used by _convert_one in ProcessPoolExecutor workers. Converters hold
+# rule lambdas and cannot be pickled, so each worker builds its own once.
+_worker_converter = None
+
+def _init_worker(converter_config, log_level):
+    """
+    ProcessPoolExecutor initializer: configures logging and builds the
+    converter reused for every file handled by this worker process.
+    """
+    global _worker_converter
+    logging.getLogger().setLevel(log_level)
+    _worker_converter = MarkdownConverter(**converter_config)
+
+def _convert_one(job):
+    """
+    Worker entry point for batch conversion. Must be a module-level function
+    so that it can be pickled and sent to ProcessPoolExecutor workers.
+
+    Args:
+        job (tuple): (input_file, output_file) as passed to convert_file.
+    """
+    input_file, output_file = job
+    convert_file(input_file, output_file, _worker_converter)
 
 def main():
     """
     Main function to handle command-line arguments and initiate file processing.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Convert HTML file(s) to Markdown.',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -275,11 +747,12 @@ def main():
   python html_to_markdown_v2.py input.html output.md
   python html_to_markdown_v2.py "docs/*.html" -o output_md/
   python html_to_markdown_v2.py index.html -o . --log-level DEBUG
+  python html_to_markdown_v2.py "docs/*.html" -o output_md/ --mode async -j 16
 '''
     )
     parser.add_argument(
         'input_pattern',
-        help='Input HTML file path or glob pattern (e.g., "pages/*.html"). Quote patterns containing wildcards.'
+        help='Input HTML file path or glob pattern (e.g., "pages/*.html", or "pages/**/*.html" to recurse). Quote patterns containing wildcards.'
     )
     parser.add_argument(
         '-o', '--output',
@@ -293,6 +766,27 @@ def main():
         default='INFO',
         help='Set the logging verbosity level (default: INFO).'
     )
+    parser.add_argument(
+        '--parser',
+        choices=['lxml', 'lxml-fast', 'html.parser'],
+        default='lxml',
+        help='HTML parser backend (default: lxml). "lxml-fast" walks lxml elements directly '
+             'instead of building a BeautifulSoup tree.'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['process', 'async'],
+        default='process',
+        help='How to parallelize batch conversion: "process" spreads CPU-bound work across '
+             'processes, "async" overlaps file I/O and suits many small files on slow storage '
+             '(default: process).'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Maximum number of files converted at once (default: number of CPUs).'
+    )
     # Could add --ignore-tags argument here later
 
     if len(sys.argv) == 1:
@@ -301,8 +795,12 @@ def main():
 
     args = parser.parse_args()
 
+    # Update the root logger's level. Note: This affects global logging.
+    logging.getLogger().setLevel(args.log_level)
+
     # --- Input File Resolution ---
-    input_files = glob.glob(args.input_pattern)
+    # recursive=True lets "**" match any number of directories
+    input_files = glob.glob(args.input_pattern, recursive=True)
 
     if not input_files:
         logging.error(f"No files found matching pattern: {args.input_pattern}")
@@ -333,8 +831,10 @@ def main():
             single_output_file = args.output
 
     # --- Process Files ---
-    converter_config = {'log_level_str': args.log_level} # Add other config later if needed
+    converter_config = {'parser': args.parser} # Add other config later if needed
 
+    # Resolve (input, output) pairs first so the conversions can run in parallel
+    pairs = []
     for input_file in input_files:
         output_file = None
         base_name = os.path.basename(input_file)
@@ -356,13 +856,32 @@ def main():
             logging.error(f"Input and output file paths are the same: {input_file}. Skipping.")
             continue
 
-        convert_file(input_file, output_file, converter_config)
+        pairs.append((input_file, output_file))
 
         # If a single output file was specified for multiple inputs, stop after the first.
         if single_output_file and len(input_files) > 1:
             logging.warning("Output specified as a single file, but multiple inputs found. Processed only the first file.")
             break
 
+    # Conversion is CPU-bound and files are independent, so batches are spread
+    # across worker processes (or overlapped with I/O in async mode).
+    # A single file is converted in-process. One converter is built per process
+    # and reused for every file it handles.
+    max_workers = max(1, min(args.jobs or os.cpu_count() or 1, len(pairs)))
+    if len(pairs) <= 1:
+        converter = MarkdownConverter(**converter_config)
+        for input_file, output_file in pairs:
+            convert_file(input_file, output_file, converter)
+    elif args.mode == 'async':
+        import asyncio
+        converter = MarkdownConverter(**converter_config)
+        asyncio.run(_gather_all(pairs, converter, max_workers))
+    else:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                    initializer=_init_worker,
+                                                    initargs=(converter_config, args.log_level)) as executor:
+            list(executor.map(_convert_one, pairs))
 
 if __name__ == "__main__":
     main()
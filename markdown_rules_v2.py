@@ -1,6 +1,21 @@
-# Rules accept kwargs: element, children_md, list_level, list_type, item_number
+# Rules are called positionally: rule(element, children_md, list_level, list_type, item_number)
+# A rule can also be a (prefix, suffix) tuple that wraps the children's Markdown unchanged;
+# the converter then never joins the children into an intermediate string.
+import logging
 import re
 
+# Markdown special characters escaped in text, as a str.translate table built
+# once at import time: escaping runs for every text node, link, image alt and
+# inline code, and a single C-level translate pass is much cheaper than re.sub.
+# A specific list is used to avoid over-escaping in URLs etc. ('|' is excluded).
+_ESCAPE_TABLE = str.maketrans({c: '\\' + c for c in r'\`*_{}[]()#+.!-'})
+
+# Matches any of the characters above. Short text runs (link text, inline fragments)
+# often contain none, and a regex search is then much cheaper than translate. Longer
+# runs nearly always contain punctuation, where the extra scan would only add cost.
+_ANY_META = re.compile(r'[\\`*_{}\[\]()#+.!-]')
+_EARLY_OUT_MAX_LEN = 64
+
 # --- Improvement 2: Escaping ---
 # Defined here for use within rules, especially <a> link text and list items
 def escape_markdown_chars(text):
@@ -10,60 +25,112 @@ def escape_markdown_chars(text):
     """
     if not text: # Handle None or empty strings
         return ''
-    # Escape backslashes first, then other chars
-    text = text.replace('\\', '\\\\')
-    # Escape other markdown special characters.
-    # Using a specific list to avoid over-escaping in URLs etc.
-    escape_chars = r'([`*_{}[\]()#+.!-])' # Removed '|' and initial '\' as it's handled above
-    return re.sub(escape_chars, r'\\\1', text)
+    if len(text) < _EARLY_OUT_MAX_LEN and not _ANY_META.search(text):
+        return text # Nothing to escape
+    # The table also covers backslashes
+    return text.translate(_ESCAPE_TABLE)
+
+def apply_rule(rule, element, tag_name, children_md_list, list_level, list_type, item_number, out):
+    """
+    Appends the Markdown for a converted tag to `out`. Shared by every tree walker
+    (BeautifulSoup, lxml and the compiled one) so they apply rules identically.
+
+    Args:
+        rule: The tag's rule: None (pass the children through), a (prefix, suffix)
+            tuple, or a function called positionally.
+        element: The tag, as the walker's tree represents it.
+        tag_name (str): Name of the tag.
+        children_md_list (list): Markdown fragments of the tag's children.
+        list_level (int), list_type (str | None), item_number (int): List context.
+        out (list): The parent's children Markdown list.
+    """
+    if rule is None:
+        # Default for unknown tags: pass children's content through
+        out.extend(children_md_list)
+        return
+    if rule.__class__ is tuple:
+        # (prefix, suffix) wrapper: no need to join the children here
+        out.append(rule[0])
+        out.extend(children_md_list)
+        out.append(rule[1])
+        return
+    children_md = ''.join(children_md_list)
+    try:
+        out.append(rule(element, children_md, list_level, list_type, item_number))
+    except TypeError as e:
+        logging.warning(f"Rule for '{tag_name}' failed or has wrong signature: {e}. Using children content. Check rule definition.")
+        # Fallback if rule fails or doesn't accept expected args
+        out.append(children_md) # Return processed children content as fallback
 
 # Helper function for block elements to manage whitespace
 def format_block(content):
     return f"{content.strip()}\n\n" # Use single \n, literal newlines handled later
 
+# List item indentation by nesting depth, precomputed instead of built per item
+_INDENT_CACHE = ['', '  ', '    ', '      ', '        ']
+
+def li_rule(element, children_md, list_level, list_type, item_number):
+    depth = max(list_level - 1, 0)
+    indent = _INDENT_CACHE[depth] if depth < len(_INDENT_CACHE) else '  ' * depth
+    marker = f'{item_number}. ' if list_type == 'ol' else '* '
+    return f"{indent}{marker}{children_md.strip()}\n"
+
 # --- MARKDOWN_RULES Dictionary ---
 MARKDOWN_RULES = {
-    'h1': lambda element, children_md, **kwargs: format_block(f"# {children_md.strip()}"),
-    'h2': lambda element, children_md, **kwargs: format_block(f"## {children_md.strip()}"),
-    'h3': lambda element, children_md, **kwargs: format_block(f"### {children_md.strip()}"),
-    'h4': lambda element, children_md, **kwargs: format_block(f"#### {children_md.strip()}"),
-    'h5': lambda element, children_md, **kwargs: format_block(f"##### {children_md.strip()}"),
-    'h6': lambda element, children_md, **kwargs: format_block(f"###### {children_md.strip()}"),
+    'h1': lambda element, children_md, list_level, list_type, item_number: format_block(f"# {children_md.strip()}"),
+    'h2': lambda element, children_md, list_level, list_type, item_number: format_block(f"## {children_md.strip()}"),
+    'h3': lambda element, children_md, list_level, list_type, item_number: format_block(f"### {children_md.strip()}"),
+    'h4': lambda element, children_md, list_level, list_type, item_number: format_block(f"#### {children_md.strip()}"),
+    'h5': lambda element, children_md, list_level, list_type, item_number: format_block(f"##### {children_md.strip()}"),
+    'h6': lambda element, children_md, list_level, list_type, item_number: format_block(f"###### {children_md.strip()}"),
 
-    'p': lambda element, children_md, **kwargs: format_block(children_md.strip()),
+    'p': lambda element, children_md, list_level, list_type, item_number: format_block(children_md.strip()),
 
     # Apply escaping to link text
-    'a': lambda element, children_md, **kwargs: f'[{escape_markdown_chars(children_md.strip())}]({element.get("href", "")})',
+    'a': lambda element, children_md, list_level, list_type, item_number: f'[{escape_markdown_chars(children_md.strip())}]({element.get("href", "")})',
 
-    'strong': lambda element, children_md, **kwargs: f'**{children_md}**', # Don't strip internal whitespace
-    'b': lambda element, children_md, **kwargs: f'**{children_md}**',      # Treat <b> like <strong>
+    'strong': ('**', '**'), # Don't strip internal whitespace
+    'b': ('**', '**'),      # Treat <b> like <strong>
 
-    'em': lambda element, children_md, **kwargs: f'*{children_md}*',       # Don't strip internal whitespace
-    'i': lambda element, children_md, **kwargs: f'*{children_md}*',        # Treat <i> like <em>
+    'em': ('*', '*'),       # Don't strip internal whitespace
+    'i': ('*', '*'),        # Treat <i> like <em>
 
     # Use element.string or get_text() for code/pre to avoid processing internal tags as Markdown
     # Apply escaping to content within single backticks
-    'code': lambda element, **kwargs: f'`{escape_markdown_chars(element.string or "")}`',
+    'code': lambda element, children_md, list_level, list_type, item_number: f'`{escape_markdown_chars(element.string or "")}`',
     # Let ``` block handle content literally, no internal escaping needed by default
-    'pre': lambda element, **kwargs: format_block(f'```\n{element.get_text().strip()}\n```'),
+    'pre': lambda element, children_md, list_level, list_type, item_number: format_block(f'```\n{element.get_text().strip()}\n```'),
 
-    'hr': lambda element, **kwargs: format_block('---'),
+    'hr': lambda element, children_md, list_level, list_type, item_number: format_block('---'),
 
-    'img': lambda element, **kwargs: f'![{escape_markdown_chars(element.get("alt", ""))}]( {element.get("src", "")})',
+    'img': lambda element, children_md, list_level, list_type, item_number: f'![{escape_markdown_chars(element.get("alt", ""))}]( {element.get("src", "")})',
 
     # --- List Handling (Added back based on original script's needs) ---
-    'ul': lambda element, children_md, **kwargs: format_block(children_md.strip()), # Let li handle indentation
-    'ol': lambda element, children_md, **kwargs: format_block(children_md.strip()), # Let li handle numbering/indentation
+    'ul': lambda element, children_md, list_level, list_type, item_number: format_block(children_md.strip()), # Let li handle indentation
+    'ol': lambda element, children_md, list_level, list_type, item_number: format_block(children_md.strip()), # Let li handle numbering/indentation
 
-    'li': lambda element, children_md, list_level, list_type, item_number, **kwargs:
-        f"{'  ' * (list_level - 1 if list_level > 0 else 0)}" # Indentation (adjust multiplier if needed)
-        f"{item_number}. " if list_type == 'ol' else '* '     # Marker
-        f"{children_md.strip()}\n",                             # Content and newline
+    'li': li_rule,
 
     # Handle blockquotes
-    'blockquote': lambda element, children_md, **kwargs: format_block(
+    'blockquote': lambda element, children_md, list_level, list_type, item_number: format_block(
         # Add "> " prefix to each line of the blockquote content
         '\n'.join([f"> {line}" for line in children_md.strip().split('\n')])
     ),
 }
 
+
+# --- Rules for the 'lxml-fast' parser ---
+# lxml elements support .get() like BeautifulSoup tags, so most rules work as-is.
+# Only rules that read raw text through BeautifulSoup-specific APIs need a port.
+def _lxml_string(element):
+    """lxml equivalent of BeautifulSoup's Tag.string: the element's only text, or None."""
+    if len(element) == 0:
+        return element.text
+    if len(element) == 1 and not element.text and not element[0].tail:
+        return _lxml_string(element[0])
+    return None
+
+LXML_RULES = {
+    'code': lambda element, children_md, list_level, list_type, item_number: f'`{escape_markdown_chars(_lxml_string(element) or "")}`',
+    'pre': lambda element, children_md, list_level, list_type, item_number: format_block(f'```\n{"".join(element.itertext()).strip()}\n```'),
+}
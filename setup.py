@@ -0,0 +1,16 @@
+"""
+Builds the optional compiled tree walker (_convert_tree.pyx).
+
+    pip install cython
+    python setup.py build_ext --inplace
+
+The converter works without it; html_to_markdown_v2 falls back to the
+pure-Python walker when the extension is not built.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='html_to_markdown',
+    ext_modules=cythonize('_convert_tree.pyx', language_level=3),
+)
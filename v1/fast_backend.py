@@ -0,0 +1,161 @@
+"""
+selectolax backend for the v1 converter.
+
+Parses with selectolax's Lexbor engine (C) and walks its nodes directly, so neither
+parsing nor tree access goes through BeautifulSoup objects. The same MARKDOWN_RULES
+are applied; rules see a small adapter exposing the part of the Tag API they use.
+
+    pip install selectolax
+
+html_to_markdown uses this module for parser='selectolax' (or when the
+HTML_TO_MARKDOWN_PARSER environment variable is set to 'selectolax').
+"""
+from selectolax.lexbor import LexborHTMLParser
+
+from markdown_rules import _DISPATCH
+
+# Same tag sets as the BeautifulSoup walker in html_to_markdown
+_IGNORED = frozenset({'script', 'style', 'head', 'title', 'meta', 'link'})
+_TEXT_ONLY = frozenset({'pre', 'code'})
+
+
+class _NodeView:
+    """The subset of the BeautifulSoup Tag API used by MARKDOWN_RULES, over a selectolax node."""
+    __slots__ = ('node', 'name')
+
+    def __init__(self, node):
+        self.node = node
+        self.name = node.tag
+
+    def get(self, key, default=None):
+        value = self.node.attributes.get(key)
+        return default if value is None else value
+
+    @property
+    def string(self):
+        # Like Tag.string: the only text inside, looking through single-child tags
+        node = self.node
+        while True:
+            child = node.child
+            if child is None or child.next is not None:
+                return None
+            if child.is_text_node:
+                return child.text_content
+            if not child.is_element_node:
+                return None
+            node = child
+
+    def get_text(self, separator='', strip=False):
+        return self.node.text(deep=True, separator=separator, strip=strip)
+
+
+def _children(node):
+    """Returns the child nodes of a selectolax node as a list."""
+    children = []
+    child = node.child
+    while child is not None:
+        children.append(child)
+        child = child.next
+    return children
+
+
+def convert_node(element, list_level=0, list_type=None, ol_index=0,
+                 _DISPATCH=_DISPATCH, _IGNORED=_IGNORED, _TEXT_ONLY=_TEXT_ONLY, _View=_NodeView):
+    """
+    Converts a selectolax node to Markdown.
+
+    Mirrors html_to_markdown.convert_node_to_markdown: an explicit-stack post-order walk
+    with the same list handling and rule dispatch. Comments are skipped.
+
+    Args:
+        element: The selectolax node.
+        list_level (int): Current nesting level for lists.
+        list_type (str | None): Type of the current list ('ul' or 'ol').
+        ol_index (int): 1-based number of the element if it is an 'li' in an 'ol'.
+
+    Returns:
+        str: The Markdown representation of the node.
+    """
+    # Converted Markdown of finished nodes, in document order
+    results = []
+    # Frames: (node, visited, list_level, list_type, results_start, ol_index)
+    stack = [(element, False, list_level, list_type, 0, ol_index)]
+
+    while stack:
+        node, visited, level, ltype, start, index = stack.pop()
+
+        # Second visit: the children's Markdown sits at the end of results
+        if visited:
+            children_md = "".join(results[start:])
+            del results[start:]
+
+            rule = _DISPATCH(node.tag)
+            results.append(children_md if rule is None
+                           else rule(_View(node), children_md, level, ltype, index))
+            continue
+
+        if node.is_text_node:
+            text = node.text_content
+            # Skip whitespace between tags; strip() returns text itself when there is nothing to strip
+            if not text.isspace():
+                results.append(text.strip())
+            continue
+
+        # Comments, doctypes etc.
+        if not node.is_element_node:
+            continue
+
+        tag_name = node.tag
+
+        if tag_name in _IGNORED:
+            continue
+
+        if tag_name == 'br':
+            results.append('\n')
+            continue
+
+        # pre/code rules take the text straight from the element, so don't walk their subtree
+        if tag_name in _TEXT_ONLY:
+            stack.append((node, True, level, ltype, len(results), index))
+            continue
+
+        is_list = tag_name == 'ul' or tag_name == 'ol'
+        child_level = level + is_list
+        child_list_type = tag_name if is_list else ltype
+
+        stack.append((node, True, level, ltype, len(results), index))
+        frames = []
+        li_count = 0
+        is_ol = tag_name == 'ol'
+        for child in _children(node):
+            # Number each direct 'li' child of an 'ol'
+            if is_ol and child.tag == 'li':
+                li_count += 1
+                frames.append((child, False, child_level, child_list_type, 0, li_count))
+            else:
+                frames.append((child, False, child_level, child_list_type, 0, 0))
+        # Push in reverse so children are converted (and appended) in document order
+        frames.reverse()
+        stack.extend(frames)
+
+    return "".join(results)
+
+
+def iter_markdown(html_content):
+    """
+    Converts an HTML string to Markdown, one top-level body element at a time.
+
+    Like html_to_markdown.iter_markdown, the chunks are not yet stripped or
+    newline-collapsed.
+
+    Args:
+        html_content (str | bytes): The HTML content (bytes are read as UTF-8).
+
+    Yields:
+        str: Markdown for each direct child of the document body.
+    """
+    body = LexborHTMLParser(html_content).body
+    if body is None:
+        return  # e.g. a <frameset> document
+    for child in _children(body):
+        yield convert_node(child)
@@ -1,113 +1,260 @@
+import os
+import re
+import stat
 import sys
-from bs4 import BeautifulSoup, NavigableString, Tag
-from markdown_rules import MARKDOWN_RULES
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from markdown_rules import _DISPATCH
 import logging
 
+try:
+    import lxml  # noqa: F401 -- C-accelerated parser backend for BeautifulSoup
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
+try:
+    import fast_backend  # selectolax (Lexbor) parser and walker, bypasses BeautifulSoup
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# 'selectolax' or a BeautifulSoup parser name; HTML_TO_MARKDOWN_PARSER overrides the default
+DEFAULT_PARSER = os.environ.get('HTML_TO_MARKDOWN_PARSER') or BS4_PARSER
+
+# Runs of three or more newlines, collapsed to a single blank line after conversion
+_MULTI_NL_RE = re.compile(r'\n{3,}')
+
+# Tags dropped together with their whole subtree
+_IGNORED = frozenset({'script', 'style', 'head', 'title', 'meta', 'link'})
+
+# Only <body> is converted, so only its subtree needs building
+_BODY_STRAINER = SoupStrainer('body')
+
+# Tags whose rules read the element's text themselves and never use children_md
+_TEXT_ONLY = frozenset({'pre', 'code'})
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-def convert_node_to_markdown(element, list_level=0, list_type=None):
-   """
-    Recursively converts a BeautifulSoup node (Tag or NavigableString) to Markdown.
+def convert_node_to_markdown(element, list_level=0, list_type=None, ol_index=0,
+                             _Tag=Tag, _NS=NavigableString, _DISPATCH=_DISPATCH, _IGNORED=_IGNORED,
+                             _TEXT_ONLY=_TEXT_ONLY):
+    """
+    Converts a BeautifulSoup node (Tag or NavigableString) to Markdown.
+
+    The subtree is walked with an explicit stack (post-order) rather than recursion,
+    so deeply nested documents don't pay per-node call overhead or hit the recursion limit.
 
     Args:
         element: The BeautifulSoup element (Tag or NavigableString).
         list_level (int): Current nesting level for lists.
         list_type (str | None): Type of the current list ('ul' or 'ol').
+        ol_index (int): 1-based number of the element if it is an 'li' in an 'ol'.
+        _Tag, _NS, _DISPATCH, _IGNORED, _TEXT_ONLY: Globals bound as locals for speed; not meant to be passed.
 
     Returns:
         str: The Markdown representation of the node.
     """
-    # 1. Handle Text Nodes (NavigableString)
-    if isinstance(element, NavigableString):
-        text = str(element).strip() # Strip whitespace from raw text nodes
-        # Potentially add escaping for Markdown special characters here if needed
-        return text
-
-    # 2. Handle Tags that should be ignored or have special handling
-    if not isinstance(element, Tag):
-        return '' # Should not happen with standard BS parsing
-
-    tag_name = element.name
-
-    # Ignore certain tags completely (like script, style)
-    if tag_name in ['script', 'style', 'head', 'title', 'meta', 'link']:
-        return ''
-
-    # Handle line breaks
-    if tag_name == 'br':
-        return '\\n' # Use double backslash for literal newline in Markdown output
-
-    # 3. Recursively process children
-    children_md = ""
-    item_number = 1 # For ordered lists
-    for child in element.children:
-        child_list_type = list_type
-        if tag_name == 'ul':
-            child_list_type = 'ul'
-        elif tag_name == 'ol':
-             child_list_type = 'ol'
-
-        children_md += convert_node_to_markdown(child, list_level + (1 if tag_name in ['ul', 'ol'] else 0), child_list_type)
-
-        # Increment item number for direct children of 'ol' that are 'li'
-        if tag_name == 'ol' and isinstance(child, Tag) and child.name == 'li':
-            item_number += 1
-
-    # Reset item_number for the next recursive call where parent is not 'ol'
-    if tag_name != 'ol':
-        item_number = 1
-
-    # 4. Apply Markdown rule for the current tag
-    if tag_name in MARKDOWN_RULES:
-        rule = MARKDOWN_RULES[tag_name]
-        # Pass element, processed children, list context if needed
-        try:
-            # Pass necessary context to the rule
-            kwargs = {
-                'element': element,
-                'children_md': children_md,
-                'list_level': list_level,
-                'list_type': list_type,
-                # Provide item_number for 'li' within 'ol'
-                'item_number': item_number -1 # Use the number *before* incrementing for the current item
-            }
-            return rule(**kwargs)
-        except TypeError as e:
-            logging.warning(f"Rule for '{tag_name}' failed or has wrong signature: {e}. Using children content.")
-            # Fallback if rule fails or doesn't accept expected args
-            return children_md
-    else:
-        # Default for unknown tags: return children's content
-        # logging.debug(f"No rule found for tag '{tag_name}'. Returning children content.")
-        return children_md
-
-
-def convert_html_to_markdown(html_content):
+    # Converted Markdown of finished nodes, in document order
+    results = []
+    # Frames: (node, visited, list_level, list_type, results_start, ol_index)
+    stack = [(element, False, list_level, list_type, 0, ol_index)]
+
+    while stack:
+        node, visited, level, ltype, start, index = stack.pop()
+
+        # Second visit: the children's Markdown sits at the end of results
+        if visited:
+            children_md = "".join(results[start:])
+            del results[start:]
+
+            # 4. Apply Markdown rule for the current tag; unknown tags pass their children through
+            rule = _DISPATCH(node.name)
+            results.append(children_md if rule is None
+                           else rule(node, children_md, level, ltype, index))
+            continue
+
+        # Exact-type identity checks first: a pointer compare instead of an isinstance() MRO
+        # walk. NavigableString subclasses (Comment, TemplateString, ...) take the slow path.
+        cls = node.__class__
+
+        # 1. Handle Text Nodes (NavigableString)
+        if cls is _NS or (cls is not _Tag and isinstance(node, _NS)):
+            # Whitespace between tags (the most common text node) contributes nothing
+            if not node or node.isspace():
+                continue
+            # Strip whitespace from raw text nodes; NavigableString is a str, so when there
+            # is nothing to strip it is used as is instead of being copied
+            if node[0].isspace() or node[-1].isspace():
+                results.append(node.strip())
+            else:
+                results.append(node)
+            continue
+
+        # 2. Handle Tags that should be ignored or have special handling
+        if cls is not _Tag and not isinstance(node, _Tag):
+            continue # Should not happen with standard BS parsing
+
+        tag_name = node.name
+
+        # Ignore certain tags completely (like script, style)
+        if tag_name in _IGNORED:
+            continue
+
+        # Handle line breaks
+        if tag_name == 'br':
+            results.append('\n')
+            continue
+
+        # pre/code rules take the text straight from the element, so don't walk their subtree
+        if tag_name in _TEXT_ONLY:
+            stack.append((node, True, level, ltype, len(results), index))
+            continue
+
+        # 3. Schedule the rule for this tag, then its children on top of it
+        # List context for the children depends only on this tag, so compute it once
+        is_list = tag_name == 'ul' or tag_name == 'ol'
+        child_level = level + is_list
+        child_list_type = tag_name if is_list else ltype
+        children = node.contents
+
+        stack.append((node, True, level, ltype, len(results), index))
+        if tag_name == 'ol':
+            # Number each direct 'li' child here, where it is dispatched
+            frames = []
+            li_count = 0
+            for child in children:
+                if child.__class__ is _Tag and child.name == 'li':
+                    li_count += 1
+                    frames.append((child, False, child_level, child_list_type, 0, li_count))
+                else:
+                    frames.append((child, False, child_level, child_list_type, 0, 0))
+            # Push in reverse so children are converted (and appended) in document order
+            frames.reverse()
+            stack.extend(frames)
+        else:
+            for child in reversed(children):
+                stack.append((child, False, child_level, child_list_type, 0, 0))
+
+    return "".join(results)
+
+
+def iter_markdown(html_content, parser=DEFAULT_PARSER):
     """
-    Converts an HTML string to Markdown.
+    Converts an HTML string to Markdown, one top-level element at a time.
+
+    The chunks are not yet stripped or newline-collapsed; join them and clean up like
+    convert_html_to_markdown does, or stream them to a file with _write_markdown.
 
     Args:
-        html_content (str): The HTML content string.
+        html_content (str | bytes): The HTML content; bytes are
+            read as UTF-8 and never decoded to a Python str up front.
+        parser (str): 'selectolax' for the fast_backend, or the BeautifulSoup parser to use.
+            Defaults to $HTML_TO_MARKDOWN_PARSER if set, else 'lxml' when it is installed
+            (much faster on large documents), else 'html.parser'.
 
-    Returns:
-        str: The converted Markdown string.
+    Yields:
+        str: Markdown for each direct child of the document body.
+
+    Raises:
+        UnicodeDecodeError: If bytes input is not valid UTF-8.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if not isinstance(html_content, str):
+        # The parsers would silently replace invalid bytes with U+FFFD; fail like reading
+        # the file as UTF-8 text does. The check costs little next to parsing.
+        html_content.decode('utf-8')
+
+    if parser == 'selectolax':
+        if SELECTOLAX_AVAILABLE:
+            yield from fast_backend.iter_markdown(html_content)
+            return
+        logging.warning(f"selectolax is not installed; falling back to BeautifulSoup with '{BS4_PARSER}'.")
+        parser = BS4_PARSER
+
+    # lxml always creates a <body>; html.parser does not for fragments, where straining
+    # would drop the whole document
+    parse_only = _BODY_STRAINER if parser == 'lxml' else None
+    # Bytes are UTF-8, like files read by main(); don't let bs4 guess the encoding
+    from_encoding = None if isinstance(html_content, str) else 'utf-8'
+    soup = BeautifulSoup(html_content, parser, parse_only=parse_only, from_encoding=from_encoding)
 
     # Prefer body if it exists, otherwise use the whole soup
     root_element = soup.body if soup.body else soup
 
-    # Join parts converted from root's direct children
     # We process children of the root individually to avoid wrapping the whole doc in a spurious tag
-    markdown_content = "".join(convert_node_to_markdown(child) for child in root_element.children)
+    for child in root_element.contents:
+        yield convert_node_to_markdown(child)
+
+
+def convert_html_to_markdown(html_content, parser=DEFAULT_PARSER):
+    """
+    Converts an HTML string to Markdown.
+
+    Args:
+        html_content (str): The HTML content string.
+        parser (str): Parser to use, see iter_markdown.
+
+    Returns:
+        str: The converted Markdown string.
+    """
+    markdown_content = "".join(iter_markdown(html_content, parser))
 
     # Clean up excessive newlines (more than 2 consecutive)
-    import re
-    markdown_content = re.sub(r'\\n{3,}', '\\n\\n', markdown_content.strip())
+    markdown_content = _MULTI_NL_RE.sub('\n\n', markdown_content.strip())
 
     return markdown_content
 
+
+def _write_markdown(chunks, out):
+    """
+    Writes Markdown chunks to a file with the same cleanup as convert_html_to_markdown
+    (strip, collapse newline runs) in a single forward pass.
+
+    Only the trailing whitespace of what was seen so far is held back, since a newline run
+    in it may continue into the next chunk; everything before it is written right away.
+
+    Args:
+        chunks (Iterable[str]): Markdown pieces, e.g. from iter_markdown.
+        out: Writable text file.
+    """
+    pending = ''
+    started = False
+    for chunk in chunks:
+        text = pending + chunk
+        if not started:
+            # Drop leading whitespace of the whole document
+            text = text.lstrip()
+            if not text:
+                continue
+            started = True
+        cut = len(text.rstrip())
+        if cut:
+            out.write(_MULTI_NL_RE.sub('\n\n', text[:cut]))
+        pending = text[cut:]
+    if pending:
+        out.write(_MULTI_NL_RE.sub('\n\n', pending.rstrip()))
+
+
+def _create_replacement(path):
+    """
+    Creates an empty temporary file in the directory of `path`, to be renamed over it.
+
+    The file gets the permissions open() would give the output: those of the existing
+    file, or 0o666 less the umask for a new one.
+
+    Args:
+        path (str): The file that will be replaced.
+
+    Returns:
+        str: Path of the temporary file.
+    """
+    temp_file = f"{path}.{os.urandom(4).hex()}.tmp"
+    os.close(os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+    if os.path.exists(path):
+        os.chmod(temp_file, stat.S_IMODE(os.stat(path).st_mode))
+    return temp_file
+
+
 def main():
     """
     Main function to handle command-line arguments and file operations.
@@ -121,15 +268,24 @@ def main():
 
     try:
         logging.info(f"Reading HTML from: {input_file}")
-        with open(input_file, 'r', encoding='utf-8') as f:
+        with open(input_file, 'rb') as f:
+            # Left as bytes: the parser decodes them itself without an intermediate str copy
             html_content = f.read()
 
-        logging.info("Converting HTML to Markdown...")
-        md_content = convert_html_to_markdown(html_content)
-
-        logging.info(f"Writing Markdown to: {output_file}")
-        with open(output_file, 'w', encoding='utf-8') as out:
-            out.write(md_content)
+        # Converted Markdown is written as it is produced rather than built up in memory.
+        # It goes to a temporary file next to the output, which only replaces the output
+        # once conversion has succeeded, so a failure never leaves a truncated file behind.
+        logging.info(f"Converting HTML to Markdown, writing to: {output_file}")
+        # If the output is a symlink, replace the file it points to rather than the link
+        target = os.path.realpath(output_file)
+        temp_file = _create_replacement(target)
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as out:
+                _write_markdown(iter_markdown(html_content), out)
+            os.replace(temp_file, target)
+        except BaseException:
+            os.remove(temp_file)
+            raise
 
         logging.info(f"Successfully converted {input_file} to {output_file}")
 
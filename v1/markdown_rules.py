@@ -1,28 +1,51 @@
-# Rules accept kwargs: element, children_md, list_level, list_type, item_number
+# Rules are called positionally: rule(element, children_md, list_level, list_type, ol_index)
+# ol_index is the 1-based position of an 'li' among its 'ol' parent's items (0 elsewhere).
 
 # Helper function for block elements to manage whitespace
 def format_block(content):
-    return f"{content.strip()}\\n\\n"
+    return f"{content.strip()}\n\n"
+
+# One shared handler for h1-h6; the heading level comes from the tag name
+_HEADING_PREFIXES = {f'h{level}': '#' * level + ' ' for level in range(1, 7)}
+
+def heading_rule(element, children_md, list_level, list_type, ol_index):
+    return format_block(_HEADING_PREFIXES[element.name] + children_md)
 
 MARKDOWN_RULES = {
-    'h1': lambda element, children_md, **kwargs: format_block(f"# {children_md}"),
-    'h2': lambda element, children_md, **kwargs: format_block(f"## {children_md}"),
-    'h3': lambda element, children_md, **kwargs: format_block(f"### {children_md}"),
-    'h4': lambda element, children_md, **kwargs: format_block(f"#### {children_md}"),
-    'h5': lambda element, children_md, **kwargs: format_block(f"##### {children_md}"),
-    'h6': lambda element, children_md, **kwargs: format_block(f"###### {children_md}"),
+    **dict.fromkeys(_HEADING_PREFIXES, heading_rule),
 
-    'p': lambda element, children_md, **kwargs: format_block(children_md),
+    'p': lambda element, children_md, list_level, list_type, ol_index: format_block(children_md),
 
-    'a': lambda element, children_md, **kwargs: f'[{children_md.strip()}]({element.get("href", "")})',
+    'a': lambda element, children_md, list_level, list_type, ol_index: f'[{children_md.strip()}]({element.get("href", "")})',
 
-    'strong': lambda element, children_md, **kwargs: f'**{children_md}**', # Don't strip internal whitespace
-    'b': lambda element, children_md, **kwargs: f'**{children_md}**',      # Treat <b> like <strong>
+    'strong': lambda element, children_md, list_level, list_type, ol_index: f'**{children_md}**', # Don't strip internal whitespace
+    'b': lambda element, children_md, list_level, list_type, ol_index: f'**{children_md}**',      # Treat <b> like <strong>
 
-    'em': lambda element, children_md, **kwargs: f'*{children_md}*',       # Don't strip internal whitespace
-    'i': lambda element, children_md, **kwargs: f'*{children_md}*',        # Treat <i> like <em>
+    'em': lambda element, children_md, list_level, list_type, ol_index: f'*{children_md}*',       # Don't strip internal whitespace
+    'i': lambda element, children_md, list_level, list_type, ol_index: f'*{children_md}*',        # Treat <i> like <em>
 
     # Use element.string for code/pre to avoid processing internal tags as Markdown
-    'code': lambda element, **kwargs: f'`{element.string or ""}`',
-    'pre': lambda element, **kwargs: format_block(f'```\\n{element.get_text(strip=True)}\\n
+    'code': lambda element, children_md, list_level, list_type, ol_index: f'`{element.string or ""}`',
+    'pre': lambda element, children_md, list_level, list_type, ol_index: format_block(f'```\n{element.get_text(strip=True)}\n```'),
+
+    'hr': lambda element, children_md, list_level, list_type, ol_index: format_block('---'),
+
+    'img': lambda element, children_md, list_level, list_type, ol_index: f'![{element.get("alt", "")}]({element.get("src", "")})',
+
+    # Let li handle indentation and numbering
+    'ul': lambda element, children_md, list_level, list_type, ol_index: format_block(children_md),
+    'ol': lambda element, children_md, list_level, list_type, ol_index: format_block(children_md),
+
+    'li': lambda element, children_md, list_level, list_type, ol_index:
+        f"{'  ' * max(list_level - 1, 0)}"                      # Indentation
+        f"{f'{ol_index}. ' if list_type == 'ol' else '* '}"  # Marker
+        f"{children_md.strip()}\n",                            # Content and newline
+
+    # Add "> " prefix to each line of the blockquote content
+    'blockquote': lambda element, children_md, list_level, list_type, ol_index: format_block(
+        '\n'.join(f"> {line}" for line in children_md.strip().split('\n'))
+    ),
+}
 
+# Bound lookup for the converter's hot loop
+_DISPATCH = MARKDOWN_RULES.get